@@ -5,15 +5,22 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from gtdlib.commands.add_cmd import cmd_add
-from gtdlib.commands.init_cmd import cmd_init
-from gtdlib.commands.build_cmd import cmd_build
-from gtdlib.commands.sync_cmd import cmd_sync
-from gtdlib.commands.context_cmd import cmd_context_list, cmd_context_add, cmd_context_drop
-from gtdlib.commands.project_cmd import cmd_project_list, cmd_project_edit
-from gtdlib.commands.capture_cmd import cmd_capture
+# Command modules are imported inside main() so each run only loads the
+# command it dispatches to (e.g. `capture` pulls in imaplib/email).
 
 
+COMMANDS: list[tuple[str, str]] = [
+    ("init", "Create master.json + views/ with starter Markdown files"),
+    ("add", "Interactive add (project/action)"),
+    ("build", "Generate Markdown views from master.json"),
+    ("sync", "Import checkbox completions from Markdown into master.json"),
+    ("context", "Manage allowed contexts"),
+    ("project", "Project operations"),
+    ("capture", "Capture emails via IMAP into inbox/inbox.md"),
+]
+
+DEFAULT_DIR_HELP = "GTD workspace directory (default: current directory)"
+DIR_HELP = {"init": "Directory to initialize in (default: current directory)"}
 
 
 def main() -> int:
@@ -24,82 +31,70 @@ def main() -> int:
 
     sub = parser.add_subparsers(dest="cmd", required=True)
 
-    p_init = sub.add_parser("init", help="Create master.json + views/ with starter Markdown files")
-    p_init.add_argument("--dir", default=".", help="Directory to initialize in (default: current directory)")
-
-    p_add = sub.add_parser("add", help="Interactive add (project/action)")
-    p_add.add_argument("--dir", default=".", help="GTD workspace directory (default: current directory)")
-
-    p_build = sub.add_parser("build", help="Generate Markdown views from master.json")
-    p_build.add_argument("--dir", default=".", help="GTD workspace directory (default: current directory)")
-
-    p_sync = sub.add_parser("sync", help="Import checkbox completions from Markdown into master.json")
-    p_sync.add_argument("--dir", default=".", help="GTD workspace directory (default: current directory)")
-    p_sync.add_argument("--no-prompt-next", action="store_true", help="Do not prompt for next actions after sync")
+    # Every subcommand gets the same --dir option; command-specific flags follow.
+    p: dict[str, argparse.ArgumentParser] = {}
+    for name, help_text in COMMANDS:
+        p[name] = sub.add_parser(name, help=help_text)
+        p[name].add_argument("--dir", default=".", help=DIR_HELP.get(name, DEFAULT_DIR_HELP))
 
-    p_context = sub.add_parser("context", help="Manage allowed contexts")
-    p_context.add_argument("--dir", default=".", help="GTD workspace directory (default: current directory)")
-    subc = p_context.add_subparsers(dest="context_cmd", required=True)
+    p["add"].add_argument("--input", metavar="FILE", help="Read answers from FILE ('-' for stdin), one per line, instead of prompting")
 
-    p_c_list = subc.add_parser("list", help="List contexts")
+    p["build"].add_argument("--force", action="store_true", help="Rebuild even if master.json has not changed since the last build")
 
-    p_c_add = subc.add_parser("add", help="Add a context")
-    p_c_add.add_argument("name", help="Context name (e.g. errands)")
+    p["sync"].add_argument("--no-prompt-next", action="store_true", help="Do not prompt for next actions after sync")
 
-    p_c_drop = subc.add_parser("drop", help="Drop a context")
-    p_c_drop.add_argument("name", help="Context name to remove")
-
-    p_project = sub.add_parser("project", help="Project operations")
-    p_project.add_argument("--dir", default=".", help="GTD workspace directory (default: current directory)")
-    proj = p_project.add_subparsers(dest="proj_cmd", required=True)
-
-    p_proj_list = proj.add_parser("list", help="List projects")
-    p_proj_edit = proj.add_parser("edit", help="Edit a project")
-
-    p_capture = sub.add_parser("capture", help="Capture emails via IMAP into inbox/inbox.md")
-    p_capture.add_argument("--dir", default=".", help="GTD workspace directory (default: current directory)")
-    p_capture.add_argument("--dry-run", action="store_true", help="Do not write or delete; just count")
-    p_capture.add_argument("--all", action="store_true", help="Capture ALL messages (not just UNSEEN)")
+    subc = p["context"].add_subparsers(dest="context_cmd", required=True)
+    subc.add_parser("list", help="List contexts")
+    subc.add_parser("add", help="Add a context").add_argument("name", help="Context name (e.g. errands)")
+    subc.add_parser("drop", help="Drop a context").add_argument("name", help="Context name to remove")
 
+    proj = p["project"].add_subparsers(dest="proj_cmd", required=True)
+    proj.add_parser("list", help="List projects")
+    proj.add_parser("edit", help="Edit a project")
 
+    p["capture"].add_argument("--dry-run", action="store_true", help="Do not write or delete; just count")
+    p["capture"].add_argument("--all", action="store_true", help="Capture ALL messages (not just UNSEEN)")
 
     args = parser.parse_args()
 
+    # Every subcommand takes --dir; resolve it once for whichever one runs.
+    base_dir = Path(args.dir).expanduser().resolve()
+
     if args.cmd == "init":
-        base_dir = Path(args.dir).expanduser().resolve()
+        from gtdlib.commands.init_cmd import cmd_init
         return cmd_init(base_dir)
 
     if args.cmd == "add":
-        base_dir = Path(args.dir).expanduser().resolve()
-        return cmd_add(base_dir)
+        from gtdlib.commands.add_cmd import cmd_add
+        return cmd_add(base_dir, input_path=args.input)
 
     if args.cmd == "build":
-        base_dir = Path(args.dir).expanduser().resolve()
-        return cmd_build(base_dir)
+        from gtdlib.commands.build_cmd import cmd_build
+        return cmd_build(base_dir, force=args.force)
 
 
     if args.cmd == "sync":
-        base_dir = Path(args.dir).expanduser().resolve()
+        from gtdlib.commands.sync_cmd import cmd_sync
         return cmd_sync(base_dir, prompt_next=not args.no_prompt_next)
 
     if args.cmd == "context":
-        base_dir = Path(args.dir).expanduser().resolve()
+        from gtdlib.commands import context_cmd
         if args.context_cmd == "list":
-            return cmd_context_list(base_dir)
+            return context_cmd.cmd_context_list(base_dir)
         if args.context_cmd == "add":
-            return cmd_context_add(base_dir, args.name)
+            return context_cmd.cmd_context_add(base_dir, args.name)
         if args.context_cmd == "drop":
-            return cmd_context_drop(base_dir, args.name)
+            return context_cmd.cmd_context_drop(base_dir, args.name)
 
     if args.cmd == "project":
-        base_dir = Path(args.dir).expanduser().resolve()
+        from gtdlib.commands import project_cmd
         if args.proj_cmd == "list":
-            return cmd_project_list(base_dir)
+            return project_cmd.cmd_project_list(base_dir)
         if args.proj_cmd == "edit":
-            return cmd_project_edit(base_dir)
+            return project_cmd.cmd_project_edit(base_dir)
 
     if args.cmd == "capture":
-        base_dir = Path(args.dir).expanduser().resolve()
+        from gtdlib.commands.capture_cmd import cmd_capture
         return cmd_capture(base_dir, dry_run=args.dry_run, all_mail=args.all)
 
 
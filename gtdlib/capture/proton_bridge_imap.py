@@ -2,31 +2,93 @@
 from __future__ import annotations
 
 import imaplib
-import email
+from email import policy
 from email.header import decode_header
 from email.message import Message
+from email.parser import BytesParser
 from pathlib import Path
 from datetime import datetime, timezone
+import functools
 import getpass
+import itertools
+import os
 import re
+import string
 import html as _html
 
-_SCRIPT_STYLE_RE = re.compile(r"(?is)<(script|style).*?>.*?</\1>")
+# One parser for the whole run (same compat32 policy as email.message_from_bytes).
+# compat32 on purpose: every captured message needs its body and attachments,
+# so a headers-only parse never suffices, and policy.default (get_body /
+# iter_attachments) is several times slower than one compat32 walk.
+_PARSER = BytesParser(policy=policy.compat32)
+
+# \b so <scripts>/<styleish> don't open an element; see _strip_script_style
+_SCRIPT_STYLE_OPEN_RE = re.compile(r"(?i)<(script|style)\b")
+_SCRIPT_STYLE_CLOSE_RE = {
+    "script": re.compile(r"(?i)</script\s*>"),
+    "style": re.compile(r"(?i)</style\s*>"),
+}
 _TAG_RE = re.compile(r"(?s)<[^>]+>")
-_WS_RE = re.compile(r"[ \t]+")
+# <br> and closing block tags all become a newline: one alternation, one pass
+_LINE_BREAK_TAG_RE = re.compile(r"(?i)<br\s*/?>|</(?:p|div|tr|li|h[1-6])>")
+_HR_RE = re.compile(r"(?i)<hr\b[^>]*>")
+_HTML_SNIFF_RE = re.compile(r"(?i)<(?:html|div|br)")
+_REPLY_CUT_RE = re.compile(r"\n(?:From:|-----Original Message-----|On |Sent:)")
+_PROTON_FOOTER_RE = re.compile(r"(?i)sent with proton mail.*$")
+# Only runs that actually change (2+ blanks, or any tab); a lone space is left
+# alone instead of being matched and replaced by itself.
+_WS_RE = re.compile(r" [ \t]+|\t[ \t]*")
 _MULTI_NL_RE = re.compile(r"\n{3,}")
 
+def _strip_script_style(s: str) -> str:
+    """
+    Drop <script>/<style> elements, tags and content.
+
+    Same result as re.sub(r"(?is)<(script|style)\b[^>]*>.*?</\1\s*>", "", s),
+    but linear: a regex retries every opener and rescans to the end of the
+    body when the closing tag is missing, which is quadratic on malformed
+    mail. Here, once a tag name has no closer ahead, later openers of that
+    name are skipped.
+    """
+    out: list[str] = []
+    pos = 0  # start of the text not yet copied to out
+    search_from = 0
+    unclosed: set[str] = set()
+
+    while True:
+        m = _SCRIPT_STYLE_OPEN_RE.search(s, search_from)
+        if not m:
+            break
+        search_from = m.end()
+        name = m.group(1).lower()
+        if name in unclosed:
+            continue
+        gt = s.find(">", search_from)
+        if gt < 0:
+            break  # no opener from here on can be completed
+        close = _SCRIPT_STYLE_CLOSE_RE[name].search(s, gt + 1)
+        if not close:
+            unclosed.add(name)
+            continue
+        out.append(s[pos:m.start()])
+        pos = search_from = close.end()
+
+    if not pos:
+        return s
+    out.append(s[pos:])
+    return "".join(out)
+
+
 def _html_to_text(s: str) -> str:
     if not s:
         return ""
 
     # remove scripts/styles
-    s = _SCRIPT_STYLE_RE.sub("", s)
+    s = _strip_script_style(s)
 
     # convert common block-ish tags to newlines
-    s = re.sub(r"(?i)<br\s*/?>", "\n", s)
-    s = re.sub(r"(?i)</(p|div|tr|li|h1|h2|h3|h4|h5|h6)>", "\n", s)
-    s = re.sub(r"(?i)<hr\b.*?>", "\n---\n", s)
+    s = _LINE_BREAK_TAG_RE.sub("\n", s)
+    s = _HR_RE.sub("\n---\n", s)
 
     # strip remaining tags
     s = _TAG_RE.sub("", s)
@@ -37,24 +99,17 @@ def _html_to_text(s: str) -> str:
     # normalize whitespace
     s = s.replace("\r\n", "\n").replace("\r", "\n")
     s = _WS_RE.sub(" ", s)
-    s = "\n".join(line.strip() for line in s.splitlines())
+    # str.strip (not a [ \t] regex): also trims the \xa0 that &nbsp; unescapes to
+    s = "\n".join(map(str.strip, s.splitlines()))
     s = _MULTI_NL_RE.sub("\n\n", s).strip()
 
     # remove common Proton footer noise
-    s = re.sub(r"(?i)sent with proton mail.*$", "", s).strip()
-
-    # hard cut quoted/reply chains (simple heuristic)
-    cut_markers = [
-        "\nFrom:",
-        "\n-----Original Message-----",
-        "\nOn ",
-        "\nSent:",
-    ]
-    for m in cut_markers:
-        idx = s.find(m)
-        if idx != -1 and idx > 0:
-            s = s[:idx].rstrip()
-            break
+    s = _PROTON_FOOTER_RE.sub("", s).strip()
+
+    # hard cut quoted/reply chains at the earliest marker (simple heuristic)
+    m_cut = _REPLY_CUT_RE.search(s)
+    if m_cut and m_cut.start() > 0:
+        s = s[:m_cut.start()].rstrip()
 
     return s.strip()
 
@@ -62,99 +117,187 @@ def _html_to_text(s: str) -> str:
 def _decode_mime_header(value: str | None) -> str:
     if not value:
         return ""
+    if not isinstance(value, str):
+        # compat32 hands back an email.header.Header for undecodable raw bytes
+        return _decode_encoded_words(value)
+    # No RFC 2047 encoded-words: decode_header would return the value unchanged.
+    if "=?" not in value:
+        return value.strip()
+    return _decode_encoded_words_cached(value)
+
+
+def _decode_encoded_words(value) -> str:
     parts = decode_header(value)
     out: list[str] = []
     for chunk, enc in parts:
         if isinstance(chunk, bytes):
-            out.append(chunk.decode(enc or "utf-8", errors="replace"))
+            # compat32 labels raw 8-bit header bytes "unknown-8bit", which no codec knows
+            out.append(_decode_part_text(chunk, enc))
         else:
             out.append(str(chunk))
     return "".join(out).strip()
 
 
-def _extract_text_body(msg: Message) -> str:
-    # Prefer text/plain, otherwise convert text/html to plain.
+# Subjects and attachment names repeat across a capture batch (replies, forwards).
+_decode_encoded_words_cached = functools.lru_cache(maxsize=2048)(_decode_encoded_words)
+
+
+def _decode_part_text(payload: bytes, charset: str | None) -> str:
+    try:
+        return payload.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def _extract_text_and_attachments(msg: Message) -> tuple[str, list[tuple[str, bytes | None]]]:
+    """
+    Single walk over the MIME tree returning (body_text, attachments).
+
+    Body: prefer text/plain, otherwise convert text/html to plain.
+    Attachments: (decoded filename, payload) for every part that has a filename,
+    in message order; payload may be empty/None (caller skips those).
+    """
     text_plain = ""
     text_html = ""
+    attachments: list[tuple[str, bytes | None]] = []
 
     if msg.is_multipart():
+        # html parts are only decoded if no text/plain part has content
+        html_parts: list[tuple[Message, bytes | None]] = []
+
         for part in msg.walk():
-            ctype = (part.get_content_type() or "").lower()
+            filename = part.get_filename()
+            payload = None
+            if filename:
+                payload = part.get_payload(decode=True)
+                attachments.append((_decode_mime_header(filename), payload))
+
+            if part.is_multipart():
+                continue
+
             disp = (part.get("Content-Disposition") or "").lower()
             if "attachment" in disp:
                 continue
 
-            payload = part.get_payload(decode=True) or b""
-            charset = part.get_content_charset() or "utf-8"
-            try:
-                decoded = payload.decode(charset, errors="replace")
-            except LookupError:
-                decoded = payload.decode("utf-8", errors="replace")
-
+            ctype = (part.get_content_type() or "").lower()
             if ctype == "text/plain" and not text_plain:
-                text_plain = decoded.strip()
-            elif ctype == "text/html" and not text_html:
-                text_html = decoded.strip()
+                if payload is None:
+                    payload = part.get_payload(decode=True)
+                text_plain = _decode_part_text(payload or b"", part.get_content_charset()).strip()
+            elif ctype == "text/html":
+                html_parts.append((part, payload))
+
+        if not text_plain:
+            for part, payload in html_parts:
+                if payload is None:
+                    payload = part.get_payload(decode=True)
+                text_html = _decode_part_text(payload or b"", part.get_content_charset()).strip()
+                if text_html:
+                    break
     else:
-        payload = msg.get_payload(decode=True) or b""
-        charset = msg.get_content_charset() or "utf-8"
-        try:
-            decoded = payload.decode(charset, errors="replace")
-        except LookupError:
-            decoded = payload.decode("utf-8", errors="replace")
+        payload = msg.get_payload(decode=True)
+        filename = msg.get_filename()
+        if filename:
+            attachments.append((_decode_mime_header(filename), payload))
+
+        decoded = _decode_part_text(payload or b"", msg.get_content_charset())
 
         # guess if it's html-ish
-        if "<html" in decoded.lower() or "<div" in decoded.lower() or "<br" in decoded.lower():
+        if _HTML_SNIFF_RE.search(decoded):
             text_html = decoded.strip()
         else:
             text_plain = decoded.strip()
 
     if text_plain:
-        return text_plain
+        return text_plain, attachments
 
     if text_html:
-        return _html_to_text(text_html)
+        return _html_to_text(text_html), attachments
 
-    return ""
+    return "", attachments
 
 
 
-_filename_bad = re.compile(r"[^A-Za-z0-9.\-_ ]+")
+_FILENAME_OK_CHARS = string.ascii_letters + string.digits + ".-_ "
+_filename_bad = re.compile(r"[^A-Za-z0-9.\-_ ]+", re.ASCII)
+# Deletes every allowed char; an empty result means the name needs no cleanup.
+_FILENAME_OK_TABLE = str.maketrans("", "", _FILENAME_OK_CHARS)
+_PATH_SEP_TABLE = str.maketrans("/\\", "__")
 
 def _safe_filename(name: str) -> str:
-    name = name.strip().replace("/", "_").replace("\\", "_")
-    name = _filename_bad.sub("_", name)
+    name = name.strip().translate(_PATH_SEP_TABLE)
+    if name.translate(_FILENAME_OK_TABLE):
+        name = _filename_bad.sub("_", name)
     if not name:
         name = "attachment"
     return name
 
 
-def _save_attachments(msg: Message, attachments_dir: Path) -> list[str]:
-    attachments_dir.mkdir(parents=True, exist_ok=True)
+def _save_attachments(
+    attachments: list[tuple[str, bytes | None]],
+    attachments_dir: Path,
+    stamp: str,
+    first_index: int = 1,
+) -> list[str]:
+    """
+    Write named parts into attachments_dir (which the caller has created).
+    The stamp is shared by the whole capture run, so first_index keeps the
+    numbering running across messages to avoid name clashes.
+    """
     saved: list[str] = []
 
-    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    i = 0
-
-    for part in msg.walk():
-        filename = part.get_filename()
-        if not filename:
-            continue
-
-        i += 1
-        fn = _safe_filename(_decode_mime_header(filename))
-        data = part.get_payload(decode=True)
+    # numbering counts every named part, including empty ones we skip
+    for i, (filename, data) in enumerate(attachments, start=first_index):
         if not data:
             continue
 
+        fn = _safe_filename(filename)
         out_name = f"{stamp}_{i:02d}_{fn}"
-        out_path = attachments_dir / out_name
-        out_path.write_bytes(data)
+        _write_attachment(attachments_dir / out_name, data)
         saved.append(out_name)
 
     return saved
 
 
+def _write_attachment(out_path: Path, data: bytes) -> None:
+    # The payload is already fully in memory, so a write buffer only adds a
+    # copy; hand it straight to the fd (looping on short writes).
+    fd = os.open(out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+_FETCH_UID_RE = re.compile(rb"\bUID (\d+)")
+# Messages per UID FETCH: few round-trips without holding the whole folder in memory.
+_FETCH_BATCH_SIZE = 50
+
+
+def _split_fetch_response(fetched: list) -> list[tuple[bytes, bytes]]:
+    """
+    Pair up a batched `UID FETCH ... (BODY.PEEK[])` response into (uid, raw) tuples.
+
+    imaplib returns each message as a (header, literal) tuple followed by a bytes
+    trailer (usually b")"). Servers may report UID either before the literal or in
+    that trailer, so check both.
+    """
+    out: list[tuple[bytes, bytes]] = []
+    for i, item in enumerate(fetched):
+        if not isinstance(item, tuple):
+            continue
+        header, raw = item
+        m_uid = _FETCH_UID_RE.search(header)
+        if not m_uid and i + 1 < len(fetched) and isinstance(fetched[i + 1], bytes):
+            m_uid = _FETCH_UID_RE.search(fetched[i + 1])
+        if not m_uid or not raw:
+            continue
+        out.append((m_uid.group(1), raw))
+    return out
+
+
 def capture_folder_to_inbox_md(
     *,
     host: str,
@@ -186,49 +329,74 @@ def capture_folder_to_inbox_md(
         if typ != "OK":
             raise RuntimeError(f"Could not select mailbox: {mailbox}")
 
+        # UIDs stay valid while we work, unlike sequence numbers.
         search_crit = "UNSEEN" if capture_unseen_only else "ALL"
-        typ, data = m.search(None, search_crit)
+        typ, data = m.uid("SEARCH", None, search_crit)
         if typ != "OK":
             return 0
 
-        msg_nums = [x for x in (data[0] or b"").split() if x]
-        captured = 0
+        uids = [x for x in (data[0] or b"").split() if x]
+        if not uids:
+            return 0
 
-        for num in msg_nums:
-            typ, fetched = m.fetch(num, "(RFC822)")
-            if typ != "OK" or not fetched or not fetched[0]:
+        captured = 0
+        flagged_any = False
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        att_index = 1
+
+        for start in range(0, len(uids), _FETCH_BATCH_SIZE):
+            batch = uids[start:start + _FETCH_BATCH_SIZE]
+
+            # One round-trip per batch; BODY.PEEK[] does not set \Seen.
+            # Whole messages are fetched on purpose: attachments are saved in full
+            # anyway, and a BODYSTRUCTURE pass plus per-section fetches would add
+            # round-trips and our own transfer-encoding/charset decoding to save
+            # bytes on a local Bridge connection.
+            typ, fetched = m.uid("FETCH", b",".join(batch), "(BODY.PEEK[])")
+            if typ != "OK" or not fetched:
                 continue
 
-            raw = fetched[0][1]
-            msg = email.message_from_bytes(raw)
-
-            subject = _decode_mime_header(msg.get("Subject")) or "(no subject)"
-            body = _extract_text_body(msg)
-            MAX_LINES = 20
-            MAX_CHARS = 2000
-            lines = [ln for ln in body.splitlines() if ln.strip()]
-            body = "\n".join(lines[:MAX_LINES])[:MAX_CHARS].strip()
-
-            saved_files = _save_attachments(msg, attachments_dir)
-
-            if not dry_run:
-                with inbox_md.open("a", encoding="utf-8") as f:
-                    f.write(f"- [ ] {subject}\n")
-                    if body:
-                        for line in body.splitlines():
-                            if line.strip():
-                                f.write(f"  {line.rstrip()}\n")
-                    if saved_files:
-                        f.write("  attachments:\n")
-                        for fn in saved_files:
-                            f.write(f"  - attachments/{fn}\n")
-                    f.write("\n")
+            to_delete: list[bytes] = []
+            out_lines: list[str] = []  # inbox.md entries, appended in one write per batch
 
-                # delete the email from the capture folder
-                m.store(num, "+FLAGS", r"(\Deleted)")
-            captured += 1
+            for uid, raw in _split_fetch_response(fetched):
+                msg = _PARSER.parsebytes(raw)
 
-        if not dry_run and captured:
+                subject = _decode_mime_header(msg.get("Subject")) or "(no subject)"
+                body, attachments = _extract_text_and_attachments(msg)
+                MAX_LINES = 20
+                MAX_CHARS = 2000
+                # stop at the MAX_LINES-th non-blank line instead of filtering them all
+                lines = itertools.islice((ln for ln in body.splitlines() if ln.strip()), MAX_LINES)
+                body = "\n".join(lines)[:MAX_CHARS].strip()
+
+                saved_files = _save_attachments(attachments, attachments_dir, stamp, att_index)
+                att_index += len(attachments)
+
+                if not dry_run:
+                    out_lines.append(f"- [ ] {subject}\n")
+                    out_lines.extend(f"  {ln.rstrip()}\n" for ln in body.splitlines() if ln.strip())
+                    if saved_files:
+                        out_lines.append("  attachments:\n")
+                        out_lines.extend(f"  - attachments/{fn}\n" for fn in saved_files)
+                    out_lines.append("\n")
+
+                    # delete the email from the capture folder (flagged in one STORE below)
+                    to_delete.append(uid)
+                captured += 1
+
+            # Record the batch in inbox.md before flagging it for deletion.
+            # Reopened per batch: a sync that replaces inbox.md mid-run must not
+            # leave later batches going to the old, unlinked file.
+            if out_lines:
+                with inbox_md.open("a", encoding="utf-8") as out_f:
+                    out_f.writelines(out_lines)
+
+            if to_delete:
+                m.uid("STORE", b",".join(to_delete), "+FLAGS", r"(\Deleted)")
+                flagged_any = True
+
+        if flagged_any:
             m.expunge()
 
         return captured
@@ -1,16 +1,30 @@
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 
-from gtdlib.store import load_master, new_id, save_master, utc_now_iso, prompt_optional_date, prompt
+from gtdlib.store import (
+    load_master,
+    new_id,
+    save_master,
+    utc_now_iso,
+    prompt_optional_date,
+    prompt,
+    ask,
+    load_scripted_input,
+)
 from gtdlib.config import get_contexts
 
-from gtdlib.prompts.action_prompts import prompt_action_draft, render_action_preview
+from gtdlib.prompts.action_prompts import (
+    prompt_action_draft,
+    render_action_preview,
+    stamp_action_times,
+)
 from gtdlib.prompts.confirm import confirm_save_redo_cancel
 from gtdlib.prompts.selectors import choose_project_id
 
 
-def cmd_add(base_dir: Path) -> int:
+def cmd_add(base_dir: Path, *, input_path: str | None = None) -> int:
     """
     Interactive add command.
 
@@ -18,14 +32,34 @@ def cmd_add(base_dir: Path) -> int:
     - Uses shared prompting in gtdlib/prompts to keep behavior consistent
       across add + sync-stalled prompts.
     - Includes preview + confirm step: Save / Redo / Cancel.
+    - With input_path ('-' for stdin), answers are read up front, one per
+      line in prompt order, instead of prompting interactively.
     """
+    if input_path is not None:
+        try:
+            # Decode strictly from bytes so a file and stdin reject bad UTF-8 alike
+            if input_path == "-":
+                load_scripted_input(sys.stdin.buffer.read().decode("utf-8"))
+            else:
+                load_scripted_input(Path(input_path).expanduser().read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Cannot read --input: {e}")
+            return 2
+
+    try:
+        return _add(base_dir)
+    except EOFError:
+        print("\nInput ended before all prompts were answered. Nothing saved.")
+        return 2
+
+
+def _add(base_dir: Path) -> int:
     master = load_master(base_dir)
-    now = utc_now_iso()
 
     # Contexts are enforced by config (except for waiting actions)
     contexts = get_contexts(base_dir)
 
-    kind = input("Add (a)ction or (p)roject? [a] ").strip().lower() or "a"
+    kind = ask("Add (a)ction or (p)roject? [a] ").strip().lower() or "a"
     if kind not in {"a", "p"}:
         print("Cancelled: please enter 'a' or 'p'.")
         return 2
@@ -45,7 +79,7 @@ def cmd_add(base_dir: Path) -> int:
                 draft = prompt_action_draft(
                     base_dir=base_dir,
                     contexts=contexts,
-                    now_iso=now,
+                    now_iso=None,  # stamped on save, not when the command started
                     project_id=project_id,
                     default_state="active",
                     ask_context_when_waiting=False,
@@ -65,6 +99,7 @@ def cmd_add(base_dir: Path) -> int:
                 continue
 
             aid = new_id("a")
+            stamp_action_times(draft, utc_now_iso())
             master.setdefault("actions", {})[aid] = draft
             save_master(base_dir, master)
             print(f"Added action {aid}: {draft['title']}")
@@ -75,12 +110,12 @@ def cmd_add(base_dir: Path) -> int:
     # -------------------------
     # If we reach here, kind == "p"
     while True:
-        project_title = input("Project title (outcome): ").strip()
+        project_title = ask("Project title (outcome): ").strip()
         if not project_title:
             print("Project title is required.")
             continue
 
-        project_state = input("Project state (active/someday/completed/dropped): [active] ").strip().lower() or "active"
+        project_state = ask("Project state (active/someday/completed/dropped): [active] ").strip().lower() or "active"
         if project_state not in {"active", "someday", "completed", "dropped"}:
             print("Invalid project state.")
             continue
@@ -93,7 +128,7 @@ def cmd_add(base_dir: Path) -> int:
             first_action_draft = prompt_action_draft(
                 base_dir=base_dir,
                 contexts=contexts,
-                now_iso=now,
+                now_iso=None,
                 project_id=None,  # set after pid exists
                 default_state=("active" if project_state == "active" else "someday"),
                 ask_context_when_waiting=False,
@@ -112,7 +147,7 @@ def cmd_add(base_dir: Path) -> int:
         project_draft = {
             "title": project_title,
             "state": project_state,
-            "created": now,
+            "created": None,
             "reviewed": None,
             "due": project_due,
             "notes": project_notes,
@@ -136,6 +171,9 @@ def cmd_add(base_dir: Path) -> int:
             print("Redoing...\n")
             continue
 
+        now = utc_now_iso()
+        project_draft["created"] = now
+        stamp_action_times(first_action_draft, now)
         master.setdefault("projects", {})[pid] = project_draft
         master.setdefault("actions", {})[aid] = first_action_draft
         save_master(base_dir, master)
@@ -1,20 +1,45 @@
 from __future__ import annotations
 
+import filecmp
+import os
+import tempfile
 from pathlib import Path
 from collections import defaultdict
-from gtdlib.store import load_master, VIEWS_DIRNAME
-import re
-
-_ID_COMMENT_RE = re.compile(r"<!--\s*id:(?P<id>[a-z]_[0-9a-f]{8})\s*-->")
-
-def cmd_build(base_dir: Path) -> int:
+from typing import TextIO
+from gtdlib.store import load_master, MASTER_FILENAME, VIEWS_DIRNAME
+
+# sorts undated items after every real due date
+_DUE_SENTINEL = "9999-12-31"
+
+_VIEW_NAMES = (
+    "next_actions.md",
+    "projects.md",
+    "someday.md",
+    "waiting_for.md",
+    "agenda.md",
+    "stalled_projects.md",
+)
+
+# Records which view format and master.json version (mtime_ns:size) the views
+# were last built from
+_BUILD_STAMP = ".build-stamp"
+# Bump whenever the builders' output changes, so existing views are rebuilt
+_VIEW_FORMAT = 1
+
+def cmd_build(base_dir: Path, *, force: bool = False) -> int:
     """
     Generate Markdown GTD views from master.json.
     Writes stable IDs into Markdown as HTML comments so sync can map edits back.
+    Skipped when master.json has not changed since the last build, unless force.
     """
+    views_dir = base_dir / VIEWS_DIRNAME
+    build_version = _build_version(base_dir)
+
+    if not force and build_version and _views_up_to_date(views_dir, build_version):
+        print("Views up to date (use --force to rebuild).")
+        return 0
 
     master = load_master(base_dir)
-    views_dir = base_dir / VIEWS_DIRNAME
 
     if not views_dir.exists():
         raise FileNotFoundError(
@@ -24,231 +49,235 @@ def cmd_build(base_dir: Path) -> int:
     actions = master.get("actions", {})
     projects = master.get("projects", {})
 
-    _build_next_actions(views_dir, actions, projects)
-    _build_projects(views_dir, projects, actions)
-    _build_someday(views_dir, projects, actions)
-    _build_waiting_for(views_dir, actions, projects)
-    _build_agenda(views_dir, actions, projects)
-    _build_stalled_projects(views_dir, actions, projects)
-
+    # Sort once up front; the partitions below inherit the order, so the
+    # views don't each re-sort their slice.
+    ordered_actions = sorted(
+        actions.items(),
+        key=lambda t: ((t[1].get("due") or _DUE_SENTINEL), t[1].get("title") or ""),
+    )
+    projects_by_title = sorted(projects.items(), key=lambda t: t[1].get("title", ""))
+
+    # One pass over projects/actions partitions everything the views below need.
+    active_projects: list[tuple[str, dict]] = []
+    someday_projects: list[tuple[str, dict]] = []
+    project_labels: dict[str, str] = {}  # project id -> " [Title]" suffix for action lines
+    for pid, p in projects_by_title:
+        state = p.get("state")
+        if state == "active":
+            active_projects.append((pid, p))
+        elif state == "someday":
+            someday_projects.append((pid, p))
+        title = (p.get("title") or "").strip()
+        if title:
+            project_labels[pid] = f" [{title}]"
 
+    by_context: dict[str, list[tuple[str, dict]]] = defaultdict(list)
+    agenda_by_who: dict[str, list[tuple[str, dict]]] = defaultdict(list)  # agenda_<who> contexts
+    active_count: dict[str | None, int] = defaultdict(int)  # project id -> active actions
+    waiting_actions: list[tuple[str, dict]] = []
+    someday_actions: list[tuple[str, dict]] = []
+    # Checkbox lines are formatted once: active actions show up in both
+    # next actions and agenda.
+    action_lines: dict[str, str] = {}
+
+    for aid, a in ordered_actions:
+        state = a.get("state")
+        if state == "active":
+            by_context[a.get("context", "inbox")].append((aid, a))
+            active_count[a.get("project")] += 1
+            action_lines[aid] = _action_line(aid, a, project_labels)
+            ctx = (a.get("context") or "").strip()
+            if ctx.startswith("agenda_"):
+                agenda_by_who[ctx[len("agenda_"):].strip() or "unspecified"].append((aid, a))
+        elif state == "waiting":
+            waiting_actions.append((aid, a))
+            action_lines[aid] = _action_line(aid, a, project_labels)
+        elif state == "someday":
+            someday_actions.append((aid, a))
+
+    # Build every view into a staging dir first and only then move them into
+    # place: if any builder fails, none of the existing views are touched.
+    with tempfile.TemporaryDirectory(dir=views_dir, prefix=".build-") as tmp:
+        staging_dir = Path(tmp)
+        _build_next_actions(staging_dir, by_context, action_lines)
+        _build_projects(staging_dir, active_projects, active_count)
+        _build_someday(staging_dir, someday_projects, someday_actions)
+        _build_waiting_for(staging_dir, waiting_actions, action_lines)
+        _build_agenda(staging_dir, agenda_by_who, action_lines)
+        _build_stalled_projects(staging_dir, active_projects, active_count)
+        _publish_views(staging_dir, views_dir)
+
+    # Unchanged views keep their old mtime, so the stamp (not the views) says what was built
+    if build_version:
+        (views_dir / _BUILD_STAMP).write_text(build_version, encoding="utf-8")
 
     print("Views rebuilt.")
     return 0
 
 
 
-def _id_comment(item_id: str) -> str:
-    return f"<!-- id:{item_id} -->"
+def _build_version(base_dir: Path) -> str | None:
+    """'format:mtime_ns:size' for master.json, or None if it is missing."""
+    try:
+        st = (base_dir / MASTER_FILENAME).stat()
+    except FileNotFoundError:
+        return None
+    return f"{_VIEW_FORMAT}:{st.st_mtime_ns}:{st.st_size}"
 
 
-# -------------------------
-# View builders
-# -------------------------
+def _views_up_to_date(views_dir: Path, build_version: str) -> bool:
+    """True if all views exist and the last build matches this format and master.json version."""
+    try:
+        if (views_dir / _BUILD_STAMP).read_text(encoding="utf-8") != build_version:
+            return False
+    except FileNotFoundError:
+        return False
+    return all((views_dir / name).exists() for name in _VIEW_NAMES)
 
-def _build_next_actions(views_dir: Path, actions: dict, projects: dict) -> None:
-    # Group ACTIVE actions by context
-    by_context: dict[str, list[tuple[str, dict]]] = defaultdict(list)
-
-    for aid, action in actions.items():
-        if action.get("state") == "active":
-            ctx = action.get("context", "inbox")
-            by_context[ctx].append((aid, action))
 
-    lines: list[str] = ["# Next Actions\n"]
-
-    for context in sorted(by_context):
-        lines.append(f"## @{context}\n")
-        # stable ordering: due date then title
-        items = sorted(
-            by_context[context],
-            key=lambda t: ((t[1].get("due") or "9999-12-31"), t[1].get("title", "")),
-        )
-        for aid, a in items:
-            due = f" (due {a['due']})" if a.get("due") else ""
-            # checkbox stays unchecked; user ticks it. We embed ID as HTML comment.
-            proj_label = ""
-            pid = a.get("project")
-            if pid and pid in projects:
-                proj_title = projects[pid].get("title", "").strip()
-                if proj_title:
-                    proj_label = f" [{proj_title}]"
+def _id_comment(item_id: str) -> str:
+    return f"<!-- id:{item_id} -->"
 
-            lines.append(f"- [ ] {a.get('title','')}{proj_label}{due} {_id_comment(aid)}")
 
+def _action_line(aid: str, a: dict, project_labels: dict[str, str]) -> str:
+    # checkbox stays unchecked; user ticks it. We embed ID as HTML comment.
+    due = f" (due {a['due']})" if a.get("due") else ""
+    pid = a.get("project")
+    proj_label = project_labels.get(pid, "") if pid else ""
+    return f"- [ ] {a.get('title','')}{proj_label}{due} {_id_comment(aid)}\n"
 
-        lines.append("")
 
-    (views_dir / "next_actions.md").write_text(
-        "\n".join(lines).strip() + "\n",
-        encoding="utf-8",
-    )
+def _open_view(path: Path) -> TextIO:
+    # builders write line by line; a 128 KiB buffer means few flushes per view
+    return path.open("w", encoding="utf-8", newline="\n", buffering=1 << 17)
 
 
-def _build_projects(views_dir: Path, projects: dict, actions: dict) -> None:
-    lines: list[str] = ["# Projects\n"]
-
-    # show ACTIVE projects
-    for pid, project in sorted(projects.items(), key=lambda t: t[1].get("title", "")):
-        if project.get("state") != "active":
+def _publish_views(staging_dir: Path, views_dir: Path) -> None:
+    """
+    Move freshly built views over the live ones.
+    A view whose content did not change is not rewritten (mtime, editors and
+    Dropbox stay quiet).
+    """
+    for name in _VIEW_NAMES:
+        built = staging_dir / name
+        live = views_dir / name
+        if live.exists() and filecmp.cmp(built, live, shallow=False):
             continue
+        os.replace(built, live)
 
-        active_actions = [
-            a for a in actions.values()
-            if a.get("project") == pid and a.get("state") == "active"
-        ]
-
-        due = f" (due {project['due']})" if project.get("due") else ""
-        lines.append(f"## {project.get('title','')}{due} {_id_comment(pid)}")
-        lines.append(f"- Active actions: {len(active_actions)}")
-        lines.append("")
-
-    (views_dir / "projects.md").write_text(
-        "\n".join(lines).strip() + "\n",
-        encoding="utf-8",
-    )
 
+# -------------------------
+# View builders
+# -------------------------
 
-def _build_someday(views_dir: Path, projects: dict, actions: dict) -> None:
-    lines: list[str] = ["# Someday / Maybe\n"]
-
-    someday_projects = [(pid, p) for pid, p in projects.items() if p.get("state") == "someday"]
-    someday_actions = [(aid, a) for aid, a in actions.items() if a.get("state") == "someday"]
-
-    if someday_projects:
-        lines.append("## Projects\n")
-        for pid, p in sorted(someday_projects, key=lambda t: t[1].get("title", "")):
-            lines.append(f"- {p.get('title','')} {_id_comment(pid)}")
-        lines.append("")
-
-    if someday_actions:
-        lines.append("## Actions\n")
-        for aid, a in sorted(someday_actions, key=lambda t: t[1].get("title", "")):
-            lines.append(f"- {a.get('title','')} {_id_comment(aid)}")
-        lines.append("")
-
-    (views_dir / "someday.md").write_text(
-        "\n".join(lines).strip() + "\n",
-        encoding="utf-8",
-    )
-
-def _build_waiting_for(views_dir: Path, actions: dict, projects: dict) -> None:
-    lines: list[str] = ["# Waiting For", ""]
-
-    # Collect waiting actions
-    items: list[tuple[str, dict]] = []
-    for aid, a in actions.items():
-        if a.get("state") == "waiting":
-            items.append((aid, a))
-
-    if not items:
-        lines.append("_No waiting items._")
-        (views_dir / "waiting_for.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
-        return
-
-    # Group by waiting_for
+def _build_next_actions(
+    views_dir: Path,
+    by_context: dict[str, list[tuple[str, dict]]],
+    action_lines: dict[str, str],
+) -> None:
+    # by_context: ACTIVE actions grouped by context, already in (due, title) order
+    with _open_view(views_dir / "next_actions.md") as f:
+        f.write("# Next Actions\n")
+
+        for context in sorted(by_context):
+            f.write(f"\n## @{context}\n\n")
+            for aid, _ in by_context[context]:
+                f.write(action_lines[aid])
+
+
+def _build_projects(views_dir: Path, active_projects: list[tuple[str, dict]], active_count: dict[str | None, int]) -> None:
+    with _open_view(views_dir / "projects.md") as f:
+        f.write("# Projects\n")
+
+        # show ACTIVE projects
+        for pid, project in active_projects:
+            due = f" (due {project['due']})" if project.get("due") else ""
+            f.write(f"\n## {project.get('title','')}{due} {_id_comment(pid)}\n")
+            f.write(f"- Active actions: {active_count.get(pid, 0)}\n")
+
+
+def _build_someday(
+    views_dir: Path,
+    someday_projects: list[tuple[str, dict]],
+    someday_actions: list[tuple[str, dict]],
+) -> None:
+    with _open_view(views_dir / "someday.md") as f:
+        f.write("# Someday / Maybe\n")
+
+        if someday_projects:
+            f.write("\n## Projects\n\n")
+            for pid, p in someday_projects:
+                f.write(f"- {p.get('title','')} {_id_comment(pid)}\n")
+
+        if someday_actions:
+            f.write("\n## Actions\n\n")
+            # id breaks title ties, so the order does not depend on the due-date presort
+            for aid, a in sorted(someday_actions, key=lambda t: (t[1].get("title", ""), t[0])):
+                f.write(f"- {a.get('title','')} {_id_comment(aid)}\n")
+
+def _build_waiting_for(
+    views_dir: Path,
+    waiting_actions: list[tuple[str, dict]],
+    action_lines: dict[str, str],
+) -> None:
+    # Sort once, then group by waiting_for; each group keeps the (due, title) order
+    waiting_actions = sorted(waiting_actions, key=lambda t: (t[1].get("due") or "", t[1].get("title") or ""))
     groups: dict[str, list[tuple[str, dict]]] = {}
-    for aid, a in items:
+    for aid, a in waiting_actions:
         who = (a.get("waiting_for") or "Unspecified").strip()
         groups.setdefault(who, []).append((aid, a))
 
-    for who in sorted(groups.keys(), key=str.lower):
-        lines.append(f"## {who}")
-        lines.append("")
-        for aid, a in sorted(groups[who], key=lambda t: (t[1].get("due") or "", t[1].get("title") or "")):
-            title = (a.get("title") or "").strip()
-
-            # Optional project label
-            proj_label = ""
-            pid = a.get("project")
-            if pid and pid in projects:
-                ptitle = (projects[pid].get("title") or "").strip()
-                if ptitle:
-                    proj_label = f" [{ptitle}]"
-
-            # Optional due suffix (match your existing style if you have a formatter)
-            due = f" (due {a['due']})" if a.get("due") else ""
-            due_suffix = f" (due {due})" if due else ""
-
-            lines.append(f"- [ ] {a.get('title','')}{proj_label}{due} {_id_comment(aid)}")
-
+    with _open_view(views_dir / "waiting_for.md") as f:
+        f.write("# Waiting For\n")
 
-        lines.append("")
+        if not groups:
+            f.write("\n_No waiting items._\n")
+            return
 
-    (views_dir / "waiting_for.md").write_text("\n".join(lines).rstrip() + "\n", encoding="utf-8")
+        for who in sorted(groups, key=lambda w: (w.lower(), w)):
+            f.write(f"\n## {who}\n\n")
+            for aid, _ in groups[who]:
+                f.write(action_lines[aid])
 
 
-def _build_agenda(views_dir: Path, actions: dict, projects: dict) -> None:
-    lines: list[str] = ["# Agenda", ""]
+def _build_agenda(
+    views_dir: Path,
+    agenda_by_who: dict[str, list[tuple[str, dict]]],
+    action_lines: dict[str, str],
+) -> None:
+    # agenda_by_who: ACTIVE agenda_* actions grouped by agenda target, already in (due, title) order
+    with _open_view(views_dir / "agenda.md") as f:
+        f.write("# Agenda\n")
 
-    agenda_items: list[tuple[str, dict]] = []
-    for aid, a in actions.items():
-        if a.get("state") != "active":
-            continue
-        ctx = (a.get("context") or "").strip()
-        if ctx.startswith("agenda_"):
-            agenda_items.append((aid, a))
+        if not agenda_by_who:
+            f.write("\n_No agenda items._\n")
+            return
 
-    if not agenda_items:
-        lines.append("_No agenda items._")
-        (views_dir / "agenda.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
-        return
+        for who in sorted(agenda_by_who, key=lambda w: (w.lower(), w)):
+            f.write(f"\n## {who}\n\n")
+            for aid, _ in agenda_by_who[who]:
+                f.write(action_lines[aid])
 
-    # Group by agenda target (context name after agenda_)
-    groups: dict[str, list[tuple[str, dict]]] = {}
-    for aid, a in agenda_items:
-        ctx = (a.get("context") or "").strip()
-        who = ctx[len("agenda_"):].strip() or "unspecified"
-        groups.setdefault(who, []).append((aid, a))
-
-    for who in sorted(groups.keys(), key=str.lower):
-        lines.append(f"## {who}")
-        lines.append("")
-        items = sorted(groups[who], key=lambda t: ((t[1].get("due") or "9999-12-31"), t[1].get("title") or ""))
-        for aid, a in items:
-            due = f" (due {a['due']})" if a.get("due") else ""
-            proj_label = ""
-            pid = a.get("project")
-            if pid and pid in projects:
-                pt = (projects[pid].get("title") or "").strip()
-                if pt:
-                    proj_label = f" [{pt}]"
-            lines.append(f"- [ ] {a.get('title','')}{proj_label}{due} {_id_comment(aid)}")
-        lines.append("")
-
-    (views_dir / "agenda.md").write_text("\n".join(lines).strip() + "\n", encoding="utf-8")
-
-
-def _build_stalled_projects(views_dir: Path, actions: dict, projects: dict) -> None:
-    lines: list[str] = ["# Stalled Projects", ""]
-
-    stalled: list[tuple[str, dict]] = []
-    for pid, p in projects.items():
-        if p.get("state") != "active":
-            continue
 
-        active_count = 0
-        for a in actions.values():
-            if a.get("project") == pid and a.get("state") == "active":
-                active_count += 1
+def _build_stalled_projects(
+    views_dir: Path,
+    active_projects: list[tuple[str, dict]],
+    active_count: dict[str | None, int],
+) -> None:
+    # active projects with no active actions
+    stalled = [(pid, p) for pid, p in active_projects if not active_count.get(pid)]
 
-        if active_count == 0:
-            stalled.append((pid, p))
-
-    if not stalled:
-        lines.append("_No stalled projects._")
-        (views_dir / "stalled_projects.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
-        return
-
-    stalled.sort(key=lambda t: (t[1].get("due") or "9999-12-31", t[1].get("title") or ""))
-
-    for pid, p in stalled:
-        title = (p.get("title") or "").strip()
-        due = p.get("due")
-        due_suffix = f" (due {due})" if due else ""
-        lines.append(f"- {title}{due_suffix} {_id_comment(pid)}")
-
-    (views_dir / "stalled_projects.md").write_text("\n".join(lines).strip() + "\n", encoding="utf-8")
+    with _open_view(views_dir / "stalled_projects.md") as f:
+        f.write("# Stalled Projects\n\n")
 
+        if not stalled:
+            f.write("_No stalled projects._\n")
+            return
 
+        stalled.sort(key=lambda t: (t[1].get("due") or _DUE_SENTINEL, t[1].get("title") or ""))
 
+        for pid, p in stalled:
+            title = (p.get("title") or "").strip()
+            due = p.get("due")
+            due_suffix = f" (due {due})" if due else ""
+            f.write(f"- {title}{due_suffix} {_id_comment(pid)}\n")
@@ -2,12 +2,12 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from gtdlib.config import get_contexts
 from gtdlib.store import ensure_config, save_config, normalize_context
 
 
 def cmd_context_list(base_dir: Path) -> int:
-    cfg = ensure_config(base_dir)
-    contexts = sorted(set(normalize_context(c) for c in cfg.get("contexts", [])))
+    contexts = get_contexts(base_dir)
     if not contexts:
         print("No contexts configured.")
         return 0
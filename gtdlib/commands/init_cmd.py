@@ -9,7 +9,7 @@ from gtdlib.store import (
     VIEWS_DIRNAME,
     utc_now_iso,
     write_json_if_missing,
-    write_text_if_missing,
+    write_bytes_if_missing,
     ensure_config,
 )
 
@@ -34,10 +34,11 @@ def cmd_init(base_dir: Path) -> int:
 
     # 2) Create master.json and config file if missing
     master_path = base_dir / MASTER_FILENAME
+    now = utc_now_iso()
     empty_master = {
         "meta": {
-            "created": utc_now_iso(),
-            "updated": utc_now_iso(),
+            "created": now,
+            "updated": now,
             "version": 1,
         },
         "projects": {},
@@ -58,7 +59,7 @@ def cmd_init(base_dir: Path) -> int:
     # 3) Create view files if missing
     for filename, starter in VIEW_FILES.items():
         p = views_dir / filename
-        if write_text_if_missing(p, starter):
+        if write_bytes_if_missing(p, starter):
             print(f"Created file:   {p}")
             created_anything = True
         else:
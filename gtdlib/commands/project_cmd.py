@@ -10,24 +10,27 @@ from gtdlib.store import (
     prompt,
     prompt_optional_date,
     utc_now_iso,
-    ensure_config,
     normalize_context,
+    ask,
 )
+from gtdlib.config import get_contexts
 
 
-def _choose_context_from_config(base_dir: Path) -> str:
-    cfg = ensure_config(base_dir)
-    contexts = [normalize_context(c) for c in cfg.get("contexts", [])]
-    contexts = sorted(set(contexts))
+_VALID_PROJECT_STATES = frozenset({"active", "someday", "completed", "dropped"})
+_YES = frozenset({"y", "yes"})
+
+
+def _choose_context(contexts: list[str]) -> str:
+    # Offers every configured context, waiting_for included (unlike add's picker)
     if not contexts:
         raise RuntimeError("No contexts configured. Add contexts with `gtd context add ...`.")
 
-    print("\nAvailable contexts:")
-    for i, c in enumerate(contexts, start=1):
-        print(f"  {i}. {c}")
+    menu = ["\nAvailable contexts:"]
+    menu.extend(f"  {i}. {c}" for i, c in enumerate(contexts, start=1))
+    print("\n".join(menu))
 
     while True:
-        raw = input("Choose context (number or name): ").strip()
+        raw = ask("Choose context (number or name): ").strip()
         if raw.isdigit():
             idx = int(raw)
             if 1 <= idx <= len(contexts):
@@ -39,35 +42,36 @@ def _choose_context_from_config(base_dir: Path) -> str:
 
 
 def _pick_project(projects: dict, *, allow_states: set[str]) -> str | None:
-    rows: list[tuple[str, str, str]] = []
+    rows: list[tuple[str, str, str, str]] = []  # (pid, title, due, title lowered once for sort + filter)
     for pid, p in projects.items():
         st = (p.get("state") or "").strip().lower()
         if st not in allow_states:
             continue
         title = (p.get("title") or "").strip() or pid
         due = (p.get("due") or "")
-        rows.append((pid, title, due))
+        rows.append((pid, title, due, title.lower()))
 
     if not rows:
         print("No projects found for the selected states.")
         return None
 
-    rows.sort(key=lambda t: (t[2] or "9999-12-31", t[1].lower()))
+    rows.sort(key=lambda t: (t[2] or "9999-12-31", t[3]))
 
-    filt = input("Filter (optional substring, blank for all): ").strip().lower()
+    filt = ask("Filter (optional substring, blank for all): ").strip().lower()
     if filt:
-        rows = [r for r in rows if filt in r[1].lower()]
+        rows = [r for r in rows if filt in r[3]]
         if not rows:
             print("No projects match that filter.")
             return None
 
-    print("\nProjects:")
-    for i, (pid, title, due) in enumerate(rows, start=1):
+    menu = ["\nProjects:"]
+    for i, (pid, title, due, _) in enumerate(rows, start=1):
         due_s = f" (due {due})" if due else ""
-        print(f"  {i}. {title}{due_s} [{pid}]")
+        menu.append(f"  {i}. {title}{due_s} [{pid}]")
+    print("\n".join(menu))
 
     while True:
-        raw = input("Choose project (number, blank to cancel): ").strip()
+        raw = ask("Choose project (number, blank to cancel): ").strip()
         if raw == "":
             return None
         if raw.isdigit():
@@ -111,6 +115,7 @@ def cmd_project_edit(base_dir: Path) -> int:
         return 0
 
     p = projects[pid]
+    before = dict(p)
 
     print("\nCurrent project:")
     print(f"  ID:    {pid}")
@@ -120,18 +125,18 @@ def cmd_project_edit(base_dir: Path) -> int:
     print(f"  Notes: {p.get('notes','')}")
 
     # --- edits (blank keeps existing) ---
-    new_title = input("New title (blank = keep): ").strip()
+    new_title = ask("New title (blank = keep): ").strip()
     if new_title:
         p["title"] = new_title
 
-    new_state = input("New state [active/someday/completed/dropped] (blank = keep): ").strip().lower()
+    new_state = ask("New state [active/someday/completed/dropped] (blank = keep): ").strip().lower()
     if new_state:
-        if new_state not in {"active", "someday", "completed", "dropped"}:
+        if new_state not in _VALID_PROJECT_STATES:
             print("Invalid state; keeping existing.")
         else:
             p["state"] = new_state
 
-    raw_due = input("New due date YYYY-MM-DD (blank = keep, '-' = clear): ").strip()
+    raw_due = ask("New due date YYYY-MM-DD (blank = keep, '-' = clear): ").strip()
     if raw_due == "-":
         p["due"] = None
     elif raw_due:
@@ -141,14 +146,16 @@ def cmd_project_edit(base_dir: Path) -> int:
         except ValueError:
             print("Invalid date; keeping existing.")
 
-    new_notes = input("New notes (blank = keep): ").strip()
+    new_notes = ask("New notes (blank = keep): ").strip()
     if new_notes:
         p["notes"] = new_notes
 
     # --- optionally add actions ---
+    contexts: list[str] | None = None  # read from config on the first added action
+    added = 0
     while True:
-        ans = input("Add an action to this project now? [y/N]: ").strip().lower()
-        if ans not in {"y", "yes"}:
+        ans = ask("Add an action to this project now? [y/N]: ").strip().lower()
+        if ans not in _YES:
             break
 
         title = prompt("Action title: ")
@@ -156,7 +163,9 @@ def cmd_project_edit(base_dir: Path) -> int:
             print("Action title required.")
             continue
 
-        context = _choose_context_from_config(base_dir)
+        if contexts is None:
+            contexts = get_contexts(base_dir)
+        context = _choose_context(contexts)
         due = prompt_optional_date("Due date")
         notes = prompt("Notes (optional): ", default="")
 
@@ -175,6 +184,12 @@ def cmd_project_edit(base_dir: Path) -> int:
             "notes": notes,
         }
         print(f"Added action {aid}")
+        added += 1
+
+    # Nothing edited or added: leave master.json (and its mtime) alone
+    if p == before and not added:
+        print("No changes.")
+        return 0
 
     # Save
     projects[pid] = p
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import Counter
 from pathlib import Path
 import re
 
@@ -9,16 +10,28 @@ from gtdlib.store import (
     utc_now_iso,
     VIEWS_DIRNAME,
     new_id,
+    ask,
+    atomic_write_bytes,
 )
 from gtdlib.config import get_contexts
 from gtdlib.prompts.action_prompts import (
     prompt_action_draft,
     render_action_preview,
+    stamp_action_times,
 )
 
 
 ID_COMMENT_RE = re.compile(r"<!--\s*id:(?P<id>[^>]+?)\s*-->")
-CHECKBOX_RE = re.compile(r"^\s*[-*+]\s*\[(?P<mark>[ xX])\]\s*(?P<text>.*)$")
+# Checkbox prefix only (a leading BOM is allowed); the rest of the line is never used.
+CHECKBOX_RE = re.compile(r"\ufeff*\s*[-*+]\s*\[(?P<mark>[ xX])\]")
+# Action states that keep a project from being stalled.
+_OPEN_STATES = frozenset(("active", "waiting"))
+# A checked top-level inbox item plus every following line up to the next top-level
+# '- [' item (or a bare '- [ ]' line at any indent). Applied to '\n'-joined lines.
+_CHECKED_INBOX_ITEM_RE = re.compile(
+    r"^\ufeff*- \[[xX]\].*\n?(?:(?!\ufeff*- \[|[^\S\n]*- \[ \][^\S\n]*$).*\n?)*",
+    re.MULTILINE,
+)
 
 
 def _prune_checked_inbox_md(inbox_md: Path) -> int:
@@ -26,55 +39,38 @@ def _prune_checked_inbox_md(inbox_md: Path) -> int:
     Remove any top-level '- [x]' items and their indented continuation lines.
     Returns number of removed items.
     """
-    if not inbox_md.exists():
+    try:
+        text = inbox_md.read_text(encoding="utf-8")
+    except FileNotFoundError:
         return 0
 
-    lines = inbox_md.read_text(encoding="utf-8").splitlines()
-    out: list[str] = []
-    removed = 0
-    i = 0
-
-    def is_top_item(line: str) -> bool:
-        s = line.lstrip("\ufeff")
-        return s.startswith("- [")  # top-level list item
-
-    while i < len(lines):
-        line = lines[i]
-        s = line.lstrip("\ufeff")
-
-        if s.startswith("- [x]") or s.startswith("- [X]"):
-            removed += 1
-            i += 1
-
-            # Skip continuation lines until next top-level item or EOF
-            while i < len(lines) and (not is_top_item(lines[i]) and lines[i].strip() != "- [ ]"):
-                i += 1
-
-            # Also skip blank lines immediately following the item block
-            while i < len(lines) and lines[i].strip() == "":
-                i += 1
-
-            continue
-
-        out.append(line)
-        i += 1
-
-    inbox_md.write_text("\n".join(out).rstrip() + "\n", encoding="utf-8")
+    pruned, removed = _CHECKED_INBOX_ITEM_RE.subn("", "\n".join(text.splitlines()))
+    if removed == 0:
+        return 0
+    atomic_write_bytes(inbox_md, (pruned.rstrip() + "\n").encode("utf-8"))
     return removed
 
 
-def _count_open_actions_for_project(actions: dict, project_id: str) -> int:
+def _count_open_actions_by_project(actions: dict) -> Counter:
     """
-    "Open" actions that prevent a project from being considered stalled.
-    We treat both active and waiting as open.
+    project id -> number of "open" actions, which prevent a project from being
+    considered stalled. We treat both active and waiting as open.
     """
-    n = 0
-    for a in actions.values():
-        if a.get("project") != project_id:
-            continue
-        if a.get("state") in {"active", "waiting"}:
-            n += 1
-    return n
+    return Counter(
+        a.get("project") for a in actions.values() if a.get("state") in _OPEN_STATES
+    )
+
+
+def _checkbox_checked(line: str) -> bool:
+    """True if the line starts with a ticked [x]/[X] checkbox."""
+    # build writes exactly "- [ ] "; only hand-edited lines need the regex
+    head = line[:5]
+    if head == "- [ ]":
+        return False
+    if head == "- [x]" or head == "- [X]":
+        return True
+    m_cb = CHECKBOX_RE.match(line)
+    return m_cb is not None and m_cb.group("mark") != " "
 
 
 def _extract_completions_from_markdown(text: str) -> dict[str, bool]:
@@ -86,26 +82,20 @@ def _extract_completions_from_markdown(text: str) -> dict[str, bool]:
       - line contains 'XXX' (user marker) anywhere after the text
     """
     results: dict[str, bool] = {}
+    # No comment at all (e.g. "_No waiting items._"): nothing to split or scan
+    if "<!--" not in text:
+        return results
 
+    id_search = ID_COMMENT_RE.search
     for line in text.splitlines():
-        m_id = ID_COMMENT_RE.search(line)
+        m_id = id_search(line)
         if not m_id:
             continue
 
         # Proton sometimes escapes underscores inside HTML comments when rendered/round-tripped
         item_id = m_id.group("id").strip().replace("\\_", "_")
 
-        done = False
-
-        norm_line = line.lstrip("\ufeff")  # remove BOM if present
-        m_cb = CHECKBOX_RE.match(norm_line)
-        if m_cb:
-            done = (m_cb.group("mark").lower() == "x")
-
-        if "XXX" in line:
-            done = True
-
-        results[item_id] = done
+        results[item_id] = "XXX" in line or _checkbox_checked(line)
 
     return results
 
@@ -130,17 +120,15 @@ def _create_next_action_for_project(
     title = (proj.get("title") or project_id).strip()
     print(f"\nProject stalled: {title}")
 
-    ans = input("Add a next action now? [Y/n]: ").strip().lower()
+    ans = ask("Add a next action now? [Y/n]: ").strip().lower()
     if ans in ("n", "no"):
         return None
 
-    now = utc_now_iso()
-
     try:
         draft = prompt_action_draft(
             base_dir=base_dir,
             contexts=contexts,
-            now_iso=now,
+            now_iso=None,  # stamped on save, not when sync started
             project_id=project_id,
             default_state="active",
             ask_context_when_waiting=False,
@@ -151,12 +139,13 @@ def _create_next_action_for_project(
 
     render_action_preview(draft)
 
-    confirm = input("Save this next action? [Y/n]: ").strip().lower()
+    confirm = ask("Save this next action? [Y/n]: ").strip().lower()
     if confirm in ("n", "no"):
         print("Cancelled. Not saved.")
         return None
 
     aid = new_id("a")
+    stamp_action_times(draft, utc_now_iso())
     actions[aid] = draft
     print(f"Added next action {aid}: {draft.get('title','')}")
     return aid
@@ -183,14 +172,27 @@ def cmd_sync(base_dir: Path, *, prompt_next: bool = True) -> int:
         views_dir / "agenda.md",
     ]
 
-    completion_map: dict[str, bool] = {}
+    texts: list[str] = []
     for fp in view_files:
-        if fp.exists():
-            completion_map.update(_extract_completions_from_markdown(fp.read_text(encoding="utf-8")))
+        try:
+            texts.append(fp.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            continue
+    # Scanning is per line, so one pass over the joined views matches per-file updates.
+    completion_map = _extract_completions_from_markdown("\n".join(texts))
 
     now = utc_now_iso()
     completed_actions = 0
     completed_projects = 0
+    added_actions = 0
+    action_done = {
+        "state": "completed",
+        "completed": now,
+        "last_touched": now,
+        "waiting_since": None,
+        "waiting_for": None,
+    }
+    project_done = {"state": "completed", "completed": now}
 
     # Apply completions
     for item_id, done in completion_map.items():
@@ -200,45 +202,46 @@ def cmd_sync(base_dir: Path, *, prompt_next: bool = True) -> int:
         if item_id.startswith("a_") and item_id in actions:
             a = actions[item_id]
             if a.get("state") != "completed":
-                a["state"] = "completed"
-                a["completed"] = now
-                a["last_touched"] = now
-                a["waiting_since"] = None
-                a["waiting_for"] = None
+                a.update(action_done)
                 completed_actions += 1
 
         elif item_id.startswith("p_") and item_id in projects:
             p = projects[item_id]
             if p.get("state") != "completed":
-                p["state"] = "completed"
-                p["completed"] = now
+                p.update(project_done)
                 completed_projects += 1
 
     # Prompt for next actions on stalled active projects
     if prompt_next:
         contexts = get_contexts(base_dir)
+        # One pass over actions; a next action added below only affects its own project.
+        open_counts = _count_open_actions_by_project(actions)
 
         for pid, p in projects.items():
             if p.get("state") != "active":
                 continue
 
-            if _count_open_actions_for_project(actions, pid) == 0:
-                _create_next_action_for_project(
+            if open_counts[pid] == 0:
+                aid = _create_next_action_for_project(
                     master=master,
                     base_dir=base_dir,
                     project_id=pid,
                     actions=actions,
                     contexts=contexts,
                 )
+                if aid:
+                    added_actions += 1
 
     # Prune checked capture items from inbox/inbox.md (no IDs; purely structural)
     pruned = _prune_checked_inbox_md(base_dir / "inbox" / "inbox.md")
     if pruned:
         print(f"Pruned {pruned} checked capture item(s) from inbox/inbox.md")
 
-    master["actions"] = actions
-    master["projects"] = projects
-    save_master(base_dir, master)
+    # A no-op sync leaves master.json (and its mtime, which build checks) untouched
+    if completed_actions or completed_projects or added_actions:
+        master["actions"] = actions
+        master["projects"] = projects
+        save_master(base_dir, master)
 
     print(f"Sync complete. Marked completed: {completed_actions} actions, {completed_projects} projects.")
     return 0
@@ -5,7 +5,5 @@ def get_contexts(base_dir):
 
     cfg = ensure_config(base_dir)
 
-    contexts = [normalize_context(c) for c in cfg.get("contexts", [])]
-
-    return sorted(set(contexts))
+    return sorted({normalize_context(c) for c in cfg.get("contexts", [])})
 
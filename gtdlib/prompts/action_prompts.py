@@ -4,23 +4,18 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Optional
 
-from gtdlib.store import prompt, prompt_optional_date, normalize_context
+from gtdlib.store import ask, prompt, prompt_optional_date, normalize_context
 
 
-_RESERVED_CONTEXTS = {"waiting_for", "waiting"}
+_RESERVED_CONTEXTS = frozenset({"waiting_for", "waiting"})
 
 
 def _clean_contexts(contexts: list[str]) -> list[str]:
     """Normalize + de-duplicate contexts, and remove reserved names."""
-    cleaned = []
-    for c in contexts:
-        c2 = normalize_context(c)
-        if not c2:
-            continue
-        if c2 in _RESERVED_CONTEXTS:
-            continue
-        cleaned.append(c2)
-    return sorted(set(cleaned))
+    cleaned = {normalize_context(c) for c in contexts}
+    cleaned -= _RESERVED_CONTEXTS
+    cleaned.discard("")
+    return sorted(cleaned)
 
 
 def choose_context(contexts: list[str]) -> str:
@@ -32,13 +27,14 @@ def choose_context(contexts: list[str]) -> str:
     contexts = _clean_contexts(contexts)
     if not contexts:
         raise RuntimeError("No contexts configured. Add contexts with `gtd context add ...`.")
+    allowed = frozenset(contexts)  # list is for display/numbering, set for validation
 
-    print("\nAvailable contexts:")
-    for i, c in enumerate(contexts, start=1):
-        print(f"  {i}. {c}")
+    menu = ["\nAvailable contexts:"]
+    menu.extend(f"  {i}. {c}" for i, c in enumerate(contexts, start=1))
+    print("\n".join(menu))
 
     while True:
-        raw = input("Choose context (number or name): ").strip()
+        raw = ask("Choose context (number or name): ").strip()
         if raw.isdigit():
             idx = int(raw)
             if 1 <= idx <= len(contexts):
@@ -48,7 +44,7 @@ def choose_context(contexts: list[str]) -> str:
             if cand in _RESERVED_CONTEXTS:
                 print("'waiting_for' is not a context (it's a state). Choose a real context like work/home/virtual.")
                 continue
-            if cand in contexts:
+            if cand in allowed:
                 return cand
 
         print("Invalid context. Choose a number from the list or type an exact context name.")
@@ -87,11 +83,18 @@ def render_action_preview(draft: dict) -> None:
 
 
 
+def stamp_action_times(action: dict, now_iso: str) -> None:
+    """Set created/last_touched (and waiting_since for waiting actions)."""
+    action["created"] = now_iso
+    action["last_touched"] = now_iso
+    action["waiting_since"] = now_iso if action.get("state") == "waiting" else None
+
+
 def prompt_action_draft(
     base_dir: Path,
     contexts: list[str],
     *,
-    now_iso: str,
+    now_iso: Optional[str],
     project_id: Optional[str] = None,
     default_state: str = "active",
     ask_context_when_waiting: bool = False,
@@ -101,6 +104,8 @@ def prompt_action_draft(
 
     Returns an action dict ready to be inserted into master["actions"][aid].
     ID is not assigned here (caller assigns).
+    With now_iso=None the timestamps are left unset; the caller stamps them
+    with stamp_action_times() when it actually saves.
     """
     title = prompt("Action title: ").strip()
     if not title:
@@ -127,11 +132,13 @@ def prompt_action_draft(
         "state": state,
         "context": context,
         "waiting_for": waiting_for,
-        "created": now_iso,
-        "last_touched": now_iso,
-        "waiting_since": now_iso if state == "waiting" else None,
+        "created": None,
+        "last_touched": None,
+        "waiting_since": None,
         "due": due,
         "notes": notes,
     }
+    if now_iso is not None:
+        stamp_action_times(action, now_iso)
 
     return action
@@ -1,7 +1,9 @@
+from gtdlib.store import ask
+
 
 def confirm_save_redo_cancel():
     while True:
-        ans = input("Save (s), redo (r), cancel (c)? [s]: ").strip().lower()
+        ans = ask("Save (s), redo (r), cancel (c)? [s]: ").strip().lower()
 
         if ans == "":
             return "s"
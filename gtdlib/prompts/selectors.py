@@ -1,29 +1,29 @@
 
-from gtdlib.store import prompt, normalize_context
-from gtdlib.config import get_contexts
+from gtdlib.store import ask
 
 
 def choose_project_id(projects: dict, allow_states=None):
     rows = []
 
     for pid, p in projects.items():
-        state = (p.get("state") or "").strip().lower()
-        if allow_states and state not in allow_states:
-            continue
+        if allow_states:
+            # States are written lowercase; only normalise hand-edited ones
+            state = p.get("state")
+            if state not in allow_states and (state or "").strip().lower() not in allow_states:
+                continue
 
         title = p.get("title") or pid
         rows.append((pid, title))
 
     rows.sort(key=lambda t: t[1].lower())
 
-    print("\nAssociate with project?")
-    print("  0. None")
-
-    for i, (_, title) in enumerate(rows, start=1):
-        print(f"  {i}. {title}")
+    # One write for the whole menu rather than one per line
+    menu = ["\nAssociate with project?", "  0. None"]
+    menu.extend(f"  {i}. {title}" for i, (_, title) in enumerate(rows, start=1))
+    print("\n".join(menu))
 
     while True:
-        raw = input("Choose project: ").strip()
+        raw = ask("Choose project: ").strip()
         if raw in ("", "0"):
             return None
 
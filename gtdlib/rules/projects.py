@@ -1,9 +1,7 @@
 
 def is_project_stalled(actions: dict, project_id: str) -> bool:
 
-    has_active = False
-    has_waiting = False
-
+    # Any one active or waiting action means the project is not stalled
     for a in actions.values():
 
         if a.get("project") != project_id:
@@ -11,10 +9,7 @@ def is_project_stalled(actions: dict, project_id: str) -> bool:
 
         state = a.get("state")
 
-        if state == "active":
-            has_active = True
-
-        elif state == "waiting":
-            has_waiting = True
+        if state == "active" or state == "waiting":
+            return False
 
-    return not (has_active or has_waiting)
+    return True
@@ -2,20 +2,29 @@
 from __future__ import annotations
 
 import json
+import os
+import secrets
+import stat
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from uuid import uuid4
+from typing import Iterator
+
+try:
+    import orjson  # optional: much faster master.json parse/encode
+except ImportError:  # stdlib json fallback
+    orjson = None
 
 MASTER_FILENAME = "master.json"
 CONFIG_FILENAME = "config.json"
 VIEWS_DIRNAME = "views"
 
-# Starter view files (you can expand later)
-VIEW_FILES: dict[str, str] = {
-    "next_actions.md": "# Next Actions\n\n",
-    "projects.md": "# Projects\n\n",
-    "someday.md": "# Someday / Maybe\n\n",
+# Starter view files (you can expand later); pre-encoded UTF-8
+VIEW_FILES: dict[str, bytes] = {
+    "next_actions.md": b"# Next Actions\n\n",
+    "projects.md": b"# Projects\n\n",
+    "someday.md": b"# Someday / Maybe\n\n",
 }
 
 # Starter contexts (you can modify later)
@@ -34,63 +43,146 @@ DEFAULT_CONTEXTS = [
 
 def utc_now_iso() -> str:
     """UTC timestamp in ISO 8601 format with 'Z'."""
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    # An aware UTC isoformat always ends in "+00:00"; slice it off rather than search
+    return datetime.now(timezone.utc).isoformat()[:-6] + "Z"
 
 
 def new_id(prefix: str) -> str:
     """Create a short unique-ish ID like a_3f9c2a1b or p_d0a41c7e."""
-    return f"{prefix}_{uuid4().hex[:8]}"
+    return f"{prefix}_{secrets.token_hex(4)}"
 
 
 def load_master(base_dir: Path) -> dict:
     master_path = base_dir / MASTER_FILENAME
-    if not master_path.exists():
+    try:
+        data = master_path.read_bytes()
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"No {MASTER_FILENAME} found in {base_dir}. Run `python3 gtd.py init --dir <path>` first."
-        )
-    return json.loads(master_path.read_text(encoding="utf-8"))
+        ) from None
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
 
 
 def save_master(base_dir: Path, master: dict) -> None:
     master_path = base_dir / MASTER_FILENAME
     master.setdefault("meta", {})
     master["meta"]["updated"] = utc_now_iso()
-    master_path.write_text(
-        json.dumps(master, indent=2, ensure_ascii=False) + "\n",
-        encoding="utf-8",
-    )
+    # Encode once to bytes; write_text would re-encode the whole blob.
+    atomic_write_bytes(master_path, _json_bytes(master))
 
 
-def write_json_if_missing(path: Path, data: dict) -> bool:
-    """Write JSON only if the file doesn't exist. Returns True if created."""
-    if path.exists():
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    Write to a uniquely named sibling temp file, then rename over path.
+    Readers (and Dropbox) never see a half-written file, and concurrent
+    writers never share a temp file. A symlinked path has its target
+    replaced (the link survives), and the file keeps its permissions.
+    """
+    target = path.resolve()
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            mode = stat.S_IMODE(os.stat(target).st_mode)
+        except FileNotFoundError:
+            mode = 0o644  # same as a newly created file elsewhere in the store
+        os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _json_bytes(data: dict) -> bytes:
+    """
+    Pretty-printed UTF-8 JSON (2-space indent, trailing newline).
+    orjson and stdlib json produce the same bytes except for floats (1e-7 vs 1e-07, NaN).
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+        )
+    return (json.dumps(data, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _create_new(path: Path) -> int | None:
+    """
+    Create path exclusively and return its fd, or None if it already exists.
+    O_EXCL does the existence check and the create in one open() call.
+    """
+    try:
+        return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return None
+
+
+def write_bytes_if_missing(path: Path, data: bytes) -> bool:
+    """Write bytes only if the file doesn't exist. Returns True if created."""
+    fd = _create_new(path)
+    if fd is None:
         return False
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
     return True
 
 
-def write_text_if_missing(path: Path, text: str) -> bool:
-    """Write text only if the file doesn't exist. Returns True if created."""
-    if path.exists():
+def write_json_if_missing(path: Path, data: dict) -> bool:
+    """
+    Write JSON only if the file doesn't exist. Returns True if created.
+    The data is only encoded once the file has been created.
+    """
+    fd = _create_new(path)
+    if fd is None:
         return False
-    path.write_text(text, encoding="utf-8")
+    with os.fdopen(fd, "wb") as f:
+        f.write(_json_bytes(data))
     return True
 
 
+# Answers preloaded by load_scripted_input(); None means read from the terminal.
+_scripted_answers: Iterator[str] | None = None
+
+
+def load_scripted_input(text: str) -> None:
+    """
+    Serve subsequent ask() calls from text, one answer per line, instead of
+    prompting field by field. Blank lines accept the prompt's default.
+    """
+    global _scripted_answers
+    _scripted_answers = iter(text.splitlines())
+
+
+def ask(text: str) -> str:
+    """input() replacement that honours load_scripted_input()."""
+    if _scripted_answers is None:
+        return input(text)
+    try:
+        return next(_scripted_answers)
+    except StopIteration:
+        raise EOFError("scripted input exhausted") from None
+
+
 def prompt(text: str, default: str | None = None) -> str:
     """
     Simple input() wrapper with optional default.
     Empty input returns default (if provided).
     """
     if default is None:
-        return input(text).strip()
-    s = input(f"{text} [{default}] ").strip()
+        return ask(text).strip()
+    s = ask(f"{text} [{default}] ").strip()
     return s if s else default
 
 
 def prompt_optional_date(text: str) -> str | None:
     """Accept YYYY-MM-DD or empty for None. (No strict validation in v1.)"""
-    s = input(f"{text} (YYYY-MM-DD, or blank): ").strip()
+    s = ask(f"{text} (YYYY-MM-DD, or blank): ").strip()
     return s or None
 
 
@@ -119,11 +211,12 @@ def ensure_config(base_dir: Path) -> dict:
     Returns the loaded config.
     """
     cfg_path = base_dir / CONFIG_FILENAME
-    if not cfg_path.exists():
+    try:
+        return json.loads(cfg_path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
         cfg = {"contexts": list(DEFAULT_CONTEXTS)}
         save_config(base_dir, cfg)
         return cfg
-    return load_config(base_dir)
 
 
 def normalize_context(s: str) -> str: